@@ -2,22 +2,45 @@
 # Dependências opcionais:
 #  - customtkinter (recomendado para aparência)
 #  - tkcalendar (opcional para calendário visual)
+#  - orjson (opcional, leitura/gravação de JSON mais rápida)
+#  - msgpack (opcional, registro de undo binário; sem ele é usado JSON por linha)
+#  - tkthread (opcional, entrega o progresso ao Tk sem polling)
 # Se preferir não instalar tkcalendar, os campos de data continuam funcionando por entrada manual.
 
 import os
 import sys
+import errno
+import stat
 import json
 import shutil
 import logging
+import logging.handlers
+import atexit
+import re
+import subprocess
 import threading
+import time
 import queue
-from datetime import datetime
+import itertools
+import collections
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import List, Dict, Optional, Callable
+from typing import List, Dict, Optional, Callable, Iterator, BinaryIO, Tuple
+
+# tkthread é opcional e precisa ser aplicado antes de o tkinter ser importado; com ele o
+# thread de trabalho agenda callbacks direto no loop do Tk, sem a fila consultada a cada 200 ms
+try:
+    import tkthread
+    tkthread.patch()
+    HAS_TKTHREAD = True
+except Exception:
+    HAS_TKTHREAD = False
 
 import customtkinter
 import tkinter
-from tkinter import filedialog, messagebox
+from tkinter import filedialog, messagebox, font as tkfont
 
 # Tentativa de usar tkcalendar; se não houver, o app continua com entradas manuais e mostra instrução
 try:
@@ -26,9 +49,25 @@ try:
 except Exception:
     HAS_TKCALENDAR = False
 
+# orjson é opcional; sem ele o módulo json da biblioteca padrão é usado
+try:
+    import orjson
+    HAS_ORJSON = True
+except Exception:
+    HAS_ORJSON = False
+
+# msgpack é opcional; sem ele o registro de undo usa JSON por linha
+try:
+    import msgpack
+    HAS_MSGPACK = True
+except Exception:
+    HAS_MSGPACK = False
+
 # ------------------- file ops -------------------
 LOGFILE = "organizer.log"
-UNDO_FILE = "undo_record.json"
+UNDO_FILE = "undo_record.log"
+# formato antigo (um único JSON reescrito a cada execução), lido apenas por compatibilidade
+LEGACY_UNDO_FILE = "undo_record.json"
 
 # Logger setup
 logger = logging.getLogger("organizer")
@@ -36,17 +75,60 @@ if not logger.handlers:
     fh = logging.FileHandler(LOGFILE, encoding="utf-8")
     fmt = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
     fh.setFormatter(fmt)
-    logger.addHandler(fh)
+    # quem loga só enfileira o registro; a escrita no arquivo acontece no thread do listener
+    _log_listener = logging.handlers.QueueListener(queue.SimpleQueue(), fh)
+    logger.addHandler(logging.handlers.QueueHandler(_log_listener.queue))
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
 logger.setLevel(logging.INFO)
 
+def _json_dumps(obj, indent: Optional[int] = 2) -> bytes:
+    # orjson só indenta com 2 espaços; o json padrão mantém a indentação pedida.
+    # indent=None gera uma única linha.
+    if HAS_ORJSON:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+    return json.dumps(obj, ensure_ascii=False, indent=indent).encode("utf-8")
+
+def _json_loads(data: bytes):
+    if HAS_ORJSON:
+        return orjson.loads(data)
+    return json.loads(data)
+
 def _parse_date(date_str: Optional[str]) -> Optional[datetime]:
     if not date_str:
         return None
     return datetime.strptime(date_str, "%Y-%m-%d")
 
-def get_matched_files(org: Dict) -> List[Path]:
+@contextmanager
+def _scandir(source: Path):
     """
-    Retorna lista de Path de arquivos que batem com as keywords e filtro de data.
+    os.scandir sobre um descritor do diretório quando o SO permite: cada DirEntry.stat()
+    vira um fstatat relativo ao diretório, sem resolver o caminho completo a cada arquivo.
+    """
+    if os.scandir in os.supports_fd:
+        dir_fd = os.open(source, os.O_RDONLY | getattr(os, "O_DIRECTORY", 0))
+        try:
+            with os.scandir(dir_fd) as it:
+                yield it
+        finally:
+            os.close(dir_fd)
+    else:
+        with os.scandir(source) as it:
+            yield it
+
+# entradas lidas do scandir por vez; o casamento é feito em lote dentro de cada bloco
+_SCAN_BATCH = 512
+
+def compile_organization(org: Dict) -> Callable[..., Iterator[Path]]:
+    """
+    Prepara uma vez o que não muda entre varreduras da organização (keywords compiladas,
+    limites de data como timestamp) e retorna scan(), que apenas percorre a pasta de origem
+    e gera, sob demanda, os Path que batem com as keywords e o filtro de data.
+    scan(cancel) aceita um threading.Event opcional, consultado a cada bloco do scandir:
+    quando setado, a varredura termina sem ler o resto da pasta.
     Espera org com chaves:
       - source (str)
       - keywords (List[str])
@@ -55,60 +137,234 @@ def get_matched_files(org: Dict) -> List[Path]:
       - end_date (str or None)
     """
     source = Path(org["source"])
-    keywords = [k.lower() for k in org.get("keywords", [])]
-    if not source.is_dir():
-        logger.warning("Source não é diretório: %s", source)
-        return []
+    # casefold (não lower) nos dois lados: "strasse" casa com "Straße.pdf", independente de como
+    # as keywords foram gravadas
+    keywords = tuple(k.casefold() for k in org.get("keywords", []) if k)
+    # uma única alternância compilada em vez de testar cada keyword por arquivo
+    pattern = re.compile("|".join(re.escape(k) for k in keywords)) if keywords else None
 
     start = _parse_date(org.get("start_date")) if org.get("date_filter_enabled") else None
     end = _parse_date(org.get("end_date")) if org.get("date_filter_enabled") else None
-    if end:
-        end = end.replace(hour=23, minute=59, second=59)
+    # limites convertidos uma vez para timestamp POSIX; no laço só se comparam floats do stat.
+    # O fim é exclusivo: meia-noite do dia seguinte, para o último segundo do dia também contar.
+    start_ts = start.timestamp() if start else None
+    end_ts = (end + timedelta(days=1)).timestamp() if end else None
+
+    def scan(cancel: Optional[threading.Event] = None) -> Iterator[Path]:
+        if not source.is_dir():
+            logger.warning("Source não é diretório: %s", source)
+            return
+        if pattern is None:
+            return
 
-    matched: List[Path] = []
-    for p in source.iterdir():
-        if p.is_dir():
-            continue
-        try:
-            mtime = datetime.fromtimestamp(p.stat().st_mtime)
-        except Exception:
-            logger.exception("Erro lendo metadados de %s", p)
-            continue
-        if start and mtime < start:
-            continue
-        if end and mtime > end:
-            continue
-        name = p.name.lower()
-        for kw in keywords:
-            if kw and kw in name:
-                matched.append(p)
+        found = 0
+        search = pattern.search
+        check_dates = start_ts is not None or end_ts is not None
+        # os.scandir reaproveita o d_type do getdents; cada bloco vira listas paralelas
+        # (entradas / nomes em casefold) e só se faz stat dos arquivos cujo nome bateu
+        with _scandir(source) as it:
+            while True:
+                if cancel is not None and cancel.is_set():
+                    logger.info("Varredura de %s cancelada", source)
+                    return
+                batch = list(itertools.islice(it, _SCAN_BATCH))
+                if not batch:
+                    break
+                # is_dir() segue links (como Path.is_dir()): link para pasta também fica de fora
+                entries = [entry for entry in batch if not entry.is_dir()]
+                low_names = [entry.name.casefold() for entry in entries]
+                hits = [i for i, name in enumerate(low_names) if search(name)]
+                for i in hits:
+                    entry = entries[i]
+                    # o stat também descarta links quebrados, mesmo sem filtro de data
+                    try:
+                        mtime = entry.stat().st_mtime
+                    except Exception:
+                        logger.exception("Erro lendo metadados de %s", source / entry.name)
+                        continue
+                    if check_dates:
+                        if start_ts is not None and mtime < start_ts:
+                            continue
+                        if end_ts is not None and mtime >= end_ts:
+                            continue
+                    found += 1
+                    yield source / entry.name
+
+        logger.info("Encontrados %d arquivo(s) em %s", found, source)
+
+    return scan
+
+def iter_matched_files(org: Dict) -> Iterator[Path]:
+    """
+    Gera, um a um, os Path de arquivos que batem com as keywords e filtro de data; quem
+    só precisa dos primeiros resultados pode parar antes de a pasta inteira ser lida.
+    Atalho para compile_organization(org)(); veja lá as chaves esperadas em org.
+    """
+    return compile_organization(org)()
+
+def get_matched_files(org: Dict) -> List[Path]:
+    """
+    Retorna lista de Path de arquivos que batem com as keywords e filtro de data.
+    """
+    return list(iter_matched_files(org))
+
+# macOS (APFS/HFS+) e Windows (NTFS) não diferenciam maiúsculas por padrão: "Fatura.pdf" e
+# "fatura.pdf" são o mesmo arquivo, então os nomes reservados são comparados já dobrados
+_CASE_INSENSITIVE_FS = sys.platform in ("darwin", "win32")
+
+def _name_key(name: str) -> str:
+    return name.casefold() if _CASE_INSENSITIVE_FS else name
+
+def _existing_names(dest_dir: str) -> set:
+    # conjunto para o parâmetro existing de _unique_dest_str; vazio se a pasta não existe
+    if not os.path.isdir(dest_dir):
+        return set()
+    return {_name_key(name) for name in os.listdir(dest_dir)}
+
+def _unique_dest_str(dest_dir: str, filename: str, existing: Optional[set] = None,
+                     check_disk: bool = False) -> str:
+    """
+    Retorna um caminho livre em dest_dir para filename, acrescentando " (n)" se necessário.
+    Se existing (de _existing_names) for passado, os candidatos são checados contra o conjunto,
+    sem tocar o disco, e o nome escolhido é reservado nele para o resto do lote; sem existing,
+    ou com check_disk=True, cada candidato também passa por um lexists().
+    """
+    def is_taken(name: str) -> bool:
+        if existing is not None:
+            if _name_key(name) in existing:
+                return True
+            if not check_disk:
+                return False
+        return os.path.lexists(os.path.join(dest_dir, name))
+
+    name = filename
+    if is_taken(name):
+        base, ext = os.path.splitext(filename)
+        counter = 1
+        while True:
+            name = f"{base} ({counter}){ext}"
+            if not is_taken(name):
                 break
+            counter += 1
+    if existing is not None:
+        existing.add(_name_key(name))
+    return os.path.join(dest_dir, name)
 
-    logger.info("Encontrados %d arquivo(s) em %s", len(matched), source)
-    return matched
+def _unique_dest(dest_dir: Path, filename: str, existing: Optional[set] = None) -> Path:
+    return Path(_unique_dest_str(str(dest_dir), filename, existing))
 
-def _unique_dest(dest_dir: Path, filename: str) -> Path:
-    dest_path = dest_dir / filename
-    if not dest_path.exists():
-        return dest_path
-    base = dest_path.stem
-    ext = dest_path.suffix
-    counter = 1
+# No Linux a cópia entre sistemas de arquivos é feita no kernel (copy_file_range/sendfile)
+FAST_MOVE = sys.platform.startswith("linux")
+_COPY_CHUNK = 2 ** 30
+
+def _copy_fd(src_fd: int, dst_fd: int) -> None:
+    use_copy_file_range = hasattr(os, "copy_file_range")
     while True:
-        candidate = dest_dir / f"{base} ({counter}){ext}"
-        if not candidate.exists():
-            return candidate
-        counter += 1
+        if use_copy_file_range:
+            try:
+                n = os.copy_file_range(src_fd, dst_fd, _COPY_CHUNK)
+            except OSError as e:
+                if e.errno not in (errno.ENOSYS, errno.EXDEV, errno.EINVAL, errno.EOPNOTSUPP):
+                    raise
+                use_copy_file_range = False
+                continue
+        else:
+            n = os.sendfile(dst_fd, src_fd, None, _COPY_CHUNK)
+        if n == 0:
+            return
+
+def _copy_xattrs(src_fd: int, dst_fd: int) -> None:
+    # como shutil._copyxattr (usado por copy2): rótulos SELinux, ACLs POSIX, user.*;
+    # FS sem suporte ou atributos sem permissão (ex.: security.* sem root) são ignorados
+    if not hasattr(os, "listxattr"):
+        return
+    try:
+        names = os.listxattr(src_fd)
+    except OSError as e:
+        if e.errno not in (errno.ENOTSUP, errno.ENODATA, errno.EINVAL):
+            raise
+        return
+    for name in names:
+        try:
+            os.setxattr(dst_fd, name, os.getxattr(src_fd, name))
+        except OSError as e:
+            if e.errno not in (errno.EPERM, errno.ENOTSUP, errno.ENODATA, errno.EINVAL):
+                raise
+
+def _fast_move(src: str, dst: str) -> None:
+    """
+    Equivalente a shutil.move para arquivos regulares: tenta os.rename e, se origem e destino
+    estiverem em sistemas de arquivos diferentes (EXDEV), copia sem passar os bytes pelo
+    userspace, preserva modo, datas e atributos estendidos e remove a origem.
+    """
+    try:
+        os.rename(src, dst)
+        return
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+    st = os.stat(src, follow_symlinks=False)
+    if not stat.S_ISREG(st.st_mode):
+        shutil.move(src, dst)
+        return
+    mode = stat.S_IMODE(st.st_mode)
+    src_fd = os.open(src, os.O_RDONLY)
+    try:
+        dst_fd = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_EXCL, mode)
+        try:
+            _copy_fd(src_fd, dst_fd)
+            _copy_xattrs(src_fd, dst_fd)
+            os.fchmod(dst_fd, mode)
+            os.utime(dst_fd, ns=(st.st_atime_ns, st.st_mtime_ns))
+        except BaseException:
+            os.close(dst_fd)
+            os.unlink(dst)
+            raise
+        os.close(dst_fd)
+    finally:
+        os.close(src_fd)
+    os.unlink(src)
+
+def _move_one(src: Path, dest_path: Path, same_fs: bool, existing: set, lock: threading.Lock) -> Path:
+    # o destino foi escolhido só pelo conjunto de nomes; se o disco já tem esse nome (arquivo
+    # criado depois da listagem, ou FS que ignora maiúsculas/normalização, ex.: vfat, SMB), o
+    # rename sobrescreveria (POSIX), então o " (n)" é buscado de novo consultando o disco
+    if os.path.lexists(dest_path):
+        with lock:
+            dest_path = Path(_unique_dest_str(str(dest_path.parent), src.name, existing, check_disk=True))
+    # no mesmo sistema de arquivos um rename basta; caso contrário copia e remove
+    if same_fs:
+        try:
+            os.rename(src, dest_path)
+            return dest_path
+        except OSError as e:
+            # só EXDEV (ex.: outro ponto de montagem no caminho) justifica copiar; os demais
+            # erros (permissão, arquivo sumiu) se repetiriam na cópia
+            if e.errno != errno.EXDEV:
+                raise
+    if FAST_MOVE:
+        _fast_move(str(src), str(dest_path))
+    else:
+        shutil.move(str(src), str(dest_path))
+    return dest_path
 
 def move_files(files: List[Path],
                destination: str,
                dry_run: bool = False,
-               progress_callback: Optional[Callable[[int, int], None]] = None
-               ) -> List[Dict]:
+               progress_callback: Optional[Callable[[int, int], None]] = None,
+               max_workers: Optional[int] = None,
+               on_op_completed: Optional[Callable[[str, str], None]] = None
+               ) -> Dict[str, List[str]]:
     """
     Move os arquivos para destination. Se dry_run=True não move, apenas simula.
     progress_callback(completed, total) é chamado após cada tentativa de arquivo.
-    Retorna lista de dicts: {"source": str, "dest": str, "action": "moved"|"would_move"|"error"}
+    on_op_completed(source, dest) é chamado, no thread que chamou move_files, assim que cada
+    movimento efetivo termina (ex.: o callback de undo_recorder, que grava o registro de undo).
+    No mesmo sistema de arquivos cada movimento é um rename, feito em série neste thread;
+    entre dispositivos (cópia + remoção) os movimentos rodam em paralelo em até max_workers
+    threads (padrão: min(32, cpu_count * 4)).
+    Retorna listas paralelas, na ordem de files:
+      {"sources": [str], "dests": [str], "actions": ["moved"|"would_move"|"error: ..."]}
     """
     dest_dir = Path(destination)
     try:
@@ -117,77 +373,257 @@ def move_files(files: List[Path],
         logger.exception("Não foi possível criar/verificar destino %s: %s", dest_dir, e)
         raise
 
-    results: List[Dict] = []
+    if max_workers is None:
+        max_workers = min(32, (os.cpu_count() or 1) * 4)
+    # checado uma vez: com INFO desligado o laço nem entra na maquinaria do logging
+    info_enabled = logger.isEnabledFor(logging.INFO)
+
     total = len(files)
+    sources = [str(src) for src in files]
+    dests: List[Optional[str]] = [None] * total
+    actions: List[Optional[str]] = [None] * total
+    results = {"sources": sources, "dests": dests, "actions": actions}
     completed = 0
 
-    for src in files:
-        try:
-            dest_path = _unique_dest(dest_dir, src.name)
-            if dry_run:
-                action = "would_move"
-                logger.info("[DRY] %s -> %s", src, dest_path)
-            else:
-                shutil.move(str(src), str(dest_path))
-                action = "moved"
-                logger.info("Moved %s -> %s", src, dest_path)
-            results.append({"source": str(src), "dest": str(dest_path), "action": action})
-        except Exception as e:
-            logger.exception("Erro movendo %s para %s: %s", src, destination, e)
-            results.append({"source": str(src), "dest": str(destination), "action": f"error: {e}"})
+    def log_summary():
+        if dry_run:
+            logger.info("[DRY] %d de %d arquivo(s) seriam movidos para %s", actions.count("would_move"), total, dest_dir)
+        else:
+            logger.info("Movidos %d de %d arquivo(s) para %s", actions.count("moved"), total, dest_dir)
+
+    def report_progress():
+        nonlocal completed
         completed += 1
         if progress_callback:
             try:
                 progress_callback(completed, total)
             except Exception:
                 logger.exception("Erro no progress_callback")
+
+    # destinos calculados em série, antes de qualquer movimento, para não haver corrida entre nomes;
+    # os nomes do destino são lidos uma vez e reservados em memória
+    existing = _existing_names(str(dest_dir))
+    pending = []
+    for i, src in enumerate(files):
+        try:
+            dest_path = _unique_dest(dest_dir, src.name, existing)
+        except Exception as e:
+            logger.exception("Erro movendo %s para %s: %s", src, destination, e)
+            dests[i] = str(destination)
+            actions[i] = f"error: {e}"
+            report_progress()
+            continue
+        if dry_run:
+            if info_enabled:
+                logger.info("[DRY] %s -> %s", src, dest_path)
+            dests[i] = str(dest_path)
+            actions[i] = "would_move"
+            report_progress()
+        else:
+            pending.append((i, src, dest_path))
+
+    if not pending:
+        log_summary()
+        return results
+
+    def finish(i, src, dest_path, error):
+        if error is not None:
+            logger.error("Erro movendo %s para %s: %s", src, destination, error, exc_info=error)
+            dests[i] = str(destination)
+            actions[i] = f"error: {error}"
+        else:
+            if info_enabled:
+                logger.info("Moved %s -> %s", src, dest_path)
+            dests[i] = str(dest_path)
+            actions[i] = "moved"
+            if on_op_completed:
+                try:
+                    on_op_completed(sources[i], dests[i])
+                except Exception:
+                    logger.exception("Erro no on_op_completed")
+        report_progress()
+
+    # agrupados por pasta de origem: o st_dev é comparado uma vez por pasta, não por arquivo,
+    # e os renames de uma mesma pasta saem em sequência
+    by_parent: Dict[Path, list] = {}
+    for op in pending:
+        by_parent.setdefault(op[1].parent, []).append(op)
+    dest_dev = os.stat(dest_dir).st_dev
+    renames, copies = [], []
+    for parent, ops in by_parent.items():
+        try:
+            same_dev = os.stat(parent).st_dev == dest_dev
+        except OSError:
+            same_dev = False
+        (renames if same_dev else copies).extend(ops)
+    # rename é uma única syscall de metadados: threads não ganham nada e só disputariam
+    # o lock dos diretórios de origem e destino
+    # protege as reservas em existing quando um destino precisa ser escolhido de novo
+    reserve_lock = threading.Lock()
+    for i, src, dest_path in renames:
+        try:
+            dest_path = _move_one(src, dest_path, True, existing, reserve_lock)
+        except Exception as e:
+            finish(i, src, dest_path, e)
+        else:
+            finish(i, src, dest_path, None)
+    if copies:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(_move_one, src, dest_path, False, existing, reserve_lock): (i, src, dest_path)
+                       for i, src, dest_path in copies}
+            for future in as_completed(futures):
+                i, src, dest_path = futures[future]
+                error = future.exception()
+                finish(i, src, dest_path if error is not None else future.result(), error)
+    log_summary()
     return results
 
-def save_undo_record(record: Dict):
-    try:
-        with open(UNDO_FILE, "w", encoding="utf-8") as f:
-            json.dump(record, f, ensure_ascii=False, indent=2)
-        logger.info("Undo record salvo (%d operações)", len(record.get("operations", [])))
-    except Exception:
-        logger.exception("Erro salvando undo record")
+def _start_undo_record() -> BinaryIO:
+    """
+    Inicia um novo registro de undo, descartando o anterior, e grava o cabeçalho
+    {"timestamp": ...}. Cada movimento é acrescentado depois com _append_undo_op
+    como um par [source, dest].
+    """
+    Path(LEGACY_UNDO_FILE).unlink(missing_ok=True)
+    f = open(UNDO_FILE, "wb")
+    # datetime aware em UTC; utcnow() é obsoleto desde o Python 3.12
+    _write_undo_entry(f, {"timestamp": datetime.now(timezone.utc).isoformat()})
+    return f
+
+def _write_undo_entry(f: BinaryIO, entry):
+    if HAS_MSGPACK:
+        f.write(msgpack.packb(entry))
+    else:
+        f.write(_json_dumps(entry, indent=None) + b"\n")
+
+def _append_undo_op(f: BinaryIO, source: str, dest: str):
+    _write_undo_entry(f, [source, dest])
+
+# operações acrescentadas ao registro de undo entre dois fsync
+_UNDO_FSYNC_EVERY = 64
+
+@contextmanager
+def undo_recorder() -> Iterator[Callable[[str, str], None]]:
+    """
+    Fornece o on_op_completed de move_files: cada (source, dest) é acrescentado ao registro
+    de undo e entregue ao sistema operacional (flush) assim que o movimento termina, então o
+    processo morrer no meio da execução preserva o que já foi movido. O registro só é iniciado
+    (substituindo o anterior) no primeiro movimento; o fsync, que protege também contra queda
+    do sistema, é feito a cada _UNDO_FSYNC_EVERY operações e ao sair do bloco.
+    """
+    f: Optional[BinaryIO] = None
+    ops = 0
+    failed = False
+
+    def sync():
+        f.flush()
+        os.fsync(f.fileno())
+
+    def on_op_completed(source: str, dest: str):
+        nonlocal f, ops, failed
+        if failed:
+            return
+        try:
+            if f is None:
+                f = _start_undo_record()
+            _append_undo_op(f, source, dest)
+            ops += 1
+            if ops % _UNDO_FSYNC_EVERY == 0:
+                sync()
+            else:
+                f.flush()
+        except Exception:
+            # sem registro completo o undo ficaria parcial; para de gravar e deixa o log dizer por quê
+            failed = True
+            logger.exception("Erro salvando undo record")
 
-def load_undo_record() -> Optional[Dict]:
     try:
-        p = Path(UNDO_FILE)
-        if not p.exists():
-            return None
-        with p.open("r", encoding="utf-8") as f:
-            return json.load(f)
+        yield on_op_completed
+    finally:
+        if f is not None:
+            try:
+                sync()
+            except Exception:
+                logger.exception("Erro salvando undo record")
+            # se o flush falhou (ex.: ENOSPC) o close tenta de novo e falha igual; os arquivos já
+            # foram movidos, então o erro fica só no log e não derruba o job
+            try:
+                f.close()
+            except Exception:
+                logger.exception("Erro fechando undo record")
+            logger.info("Undo record salvo (%d operações)", ops)
+
+def _iter_undo_entries(f: BinaryIO) -> Iterator:
+    # registros JSON começam com "{" ou "["; qualquer outro byte é um stream msgpack
+    if f.peek(1)[:1] in (b"{", b"[") or not HAS_MSGPACK:
+        for line in f:
+            if line.strip():
+                yield _json_loads(line)
+    else:
+        yield from msgpack.Unpacker(f, raw=False)
+
+def load_undo_record() -> Iterator[Tuple[str, str]]:
+    """
+    Itera, sob demanda e na ordem em que ocorreram, os pares (source, dest) do último
+    registro de undo. Aceita também operações gravadas como dict e, se só existir o
+    registro no formato antigo (LEGACY_UNDO_FILE), as operações "moved" dele.
+    """
+    try:
+        if os.path.exists(UNDO_FILE):
+            with open(UNDO_FILE, "rb") as f:
+                for entry in _iter_undo_entries(f):
+                    if isinstance(entry, list):
+                        yield entry[0], entry[1]
+                    elif "source" in entry:
+                        yield entry["source"], entry["dest"]
+        elif os.path.exists(LEGACY_UNDO_FILE):
+            with open(LEGACY_UNDO_FILE, "rb") as f:
+                record = _json_loads(f.read())
+            for op in record.get("operations", []):
+                if op.get("action") == "moved":
+                    yield op["source"], op["dest"]
     except Exception:
         logger.exception("Erro carregando undo record")
-        return None
 
 def undo_last(progress_callback: Optional[Callable[[int, int], None]] = None) -> Dict:
     """
     Tenta desfazer a última operação gravada em UNDO_FILE.
-    Retorna um dict com resultado e detalhes.
+    Retorna um dict com resultado e detalhes; "results" usa as mesmas listas paralelas de move_files.
     """
-    record = load_undo_record()
-    if not record:
+    ops = list(load_undo_record())
+    if not ops:
         return {"ok": False, "error": "Nenhum registro de undo encontrado."}
 
-    ops = record.get("operations", [])
     total = len(ops)
     completed = 0
-    results = []
-    for op in reversed(ops):
-        src = Path(op["dest"])
-        dest = Path(op["source"])
+    sources: List[str] = []
+    dests: List[str] = []
+    actions: List[str] = []
+    # nomes já presentes em cada pasta de origem (dobrados como em _existing_names), lidos uma vez por pasta
+    existing_by_dir: Dict[str, set] = {}
+    for dest, src in reversed(ops):
+        sources.append(src)
         try:
-            if not src.exists():
-                results.append({"source": str(src), "dest": str(dest), "action": "skipped_not_found"})
+            if not os.path.exists(src):
+                dests.append(dest)
+                actions.append("skipped_not_found")
             else:
-                final_dest = _unique_dest(dest.parent, dest.name)
-                shutil.move(str(src), str(final_dest))
-                results.append({"source": str(src), "dest": str(final_dest), "action": "restored"})
+                dest_dir, filename = os.path.split(dest)
+                existing = existing_by_dir.get(dest_dir)
+                if existing is None:
+                    existing = existing_by_dir[dest_dir] = _existing_names(dest_dir)
+                final_dest = _unique_dest_str(dest_dir, filename, existing)
+                # o move sobrescreveria (POSIX) um nome que o conjunto não viu (criado depois da
+                # listagem, ou FS que ignora maiúsculas); nesse caso o " (n)" consulta o disco
+                if os.path.lexists(final_dest):
+                    final_dest = _unique_dest_str(dest_dir, filename, existing, check_disk=True)
+                shutil.move(src, final_dest)
+                dests.append(final_dest)
+                actions.append("restored")
         except Exception as e:
             logger.exception("Erro desfazendo %s -> %s: %s", src, dest, e)
-            results.append({"source": str(src), "dest": str(dest), "action": f"error: {e}"})
+            dests.append(dest)
+            actions.append(f"error: {e}")
         completed += 1
         if progress_callback:
             try:
@@ -197,10 +633,11 @@ def undo_last(progress_callback: Optional[Callable[[int, int], None]] = None) ->
 
     try:
         Path(UNDO_FILE).unlink(missing_ok=True)
+        Path(LEGACY_UNDO_FILE).unlink(missing_ok=True)
     except Exception:
         logger.exception("Erro removendo UNDO_FILE")
 
-    return {"ok": True, "results": results}
+    return {"ok": True, "results": {"sources": sources, "dests": dests, "actions": actions}}
 
 # Expor logger compatível com o código GUI (apenas para nomes anteriores)
 file_logger = logger
@@ -213,6 +650,18 @@ customtkinter.set_default_color_theme("dark-blue")
 
 CONFIG_FILE = "config.json"
 
+# sentinela que encerra o thread de trabalho do App
+_SHUTDOWN = object()
+
+# quantas organizações têm o resultado da última varredura guardado em App._match_cache
+_MATCH_CACHE_SIZE = 4
+
+# último conteúdo lido/gravado de CONFIG_FILE, chaveado por (mtime_ns, tamanho) do arquivo
+_cfg_cache = {"key": None, "data": None}
+
+def _cfg_key(st: os.stat_result):
+    return (st.st_mtime_ns, st.st_size)
+
 class App(customtkinter.CTk):
     def __init__(self):
         super().__init__()
@@ -224,7 +673,30 @@ class App(customtkinter.CTk):
         self.organizations = self.load_organizations()
         self.editing_org_original_name = None
         self.last_execution_record = None  # dict retornada após execução (apenas em memória)
-        self._thread_queue = queue.Queue()
+        self._org_names_cache = None  # tuple com os nomes; reconstruída só quando organizations muda
+        self._selected_org = None  # (nome, dict) da organização selecionada no combobox
+        self._compiled = {}  # nome -> scan() de compile_organization
+        # nome -> (st_mtime_ns da origem, arquivos encontrados); LRU de _MATCH_CACHE_SIZE itens.
+        # Só é lido/escrito no thread do Tk.
+        self._match_cache = collections.OrderedDict()
+        # incrementado a cada alteração em organizations; varreduras iniciadas numa geração
+        # anterior não entram em _match_cache
+        self._orgs_generation = 0
+        self._orgs_dirty = False  # organizations mudou desde a última gravação
+        self._saved_hash = None  # hash do último conteúdo gravado em CONFIG_FILE
+        # um único thread de trabalho consome _job_queue; sem tkthread ele publica em _result_queue
+        # callbacks que _process_thread_queue executa no thread do Tk. _result_queue é uma
+        # deque: append/popleft são atômicos e não pagam lock + Condition a cada progresso.
+        # Varreduras da pré-visualização rodam cada uma num thread próprio (_submit_scan).
+        # A fila só é consultada enquanto há tarefas pendentes (_pending_jobs/_pending_scans > 0).
+        self._job_queue = queue.Queue()
+        self._result_queue = collections.deque()
+        self._pending_jobs = 0
+        self._pending_scans = 0
+        self._close_when_idle = False  # usuário pediu para fechar; fecha quando o último job terminar
+        self._poll_id = None  # id do after() de _process_thread_queue agendado, se houver
+        self._destroyed = False
+        threading.Thread(target=self._worker, daemon=True).start()
 
         # Layout principal
         self.grid_columnconfigure(0, weight=1)
@@ -245,10 +717,13 @@ class App(customtkinter.CTk):
         sel_frame.grid(row=2, column=0, sticky="ew", padx=12, pady=(0,12))
         sel_frame.grid_columnconfigure(1, weight=1)
 
-        org_names = list(self.organizations.keys()) or ["Nenhuma organização criada"]
-        self.org_combobox = customtkinter.CTkComboBox(sel_frame, values=org_names, width=420)
+        org_names = self._get_org_names() or ("Nenhuma organização criada",)
+        # somente leitura: a seleção só muda pelo menu, que mantém _selected_org em dia
+        self.org_combobox = customtkinter.CTkComboBox(sel_frame, values=org_names, width=420,
+                                                      state="readonly", command=self._select_org)
         self.org_combobox.grid(row=0, column=0, padx=(0,8), pady=4, sticky="w")
         self.org_combobox.set(org_names[0])
+        self._select_org(org_names[0])
 
         btns = customtkinter.CTkFrame(sel_frame, fg_color="transparent")
         btns.grid(row=0, column=1, sticky="e")
@@ -274,8 +749,10 @@ class App(customtkinter.CTk):
         details_container.grid(row=4, column=0, sticky="nsew", padx=12, pady=(0,12))
         details_container.grid_columnconfigure(0, weight=1)
         details_container.grid_rowconfigure(0, weight=1)
-        self.details_label = customtkinter.CTkLabel(details_container, text="Detalhes aparecerão aqui.", anchor="w", justify="left", wraplength=760)
-        self.details_label.grid(row=0, column=0, sticky="nwes", padx=12, pady=12)
+        # caixa de texto somente leitura: atualizações inserem texto em vez de refazer o layout de um label
+        self.details_box = customtkinter.CTkTextbox(details_container, wrap="word", fg_color="transparent")
+        self.details_box.grid(row=0, column=0, sticky="nwes", padx=12, pady=12)
+        self._set_details("Detalhes aparecerão aqui.")
 
         # footer actions
         footer = customtkinter.CTkFrame(self.main_frame, fg_color="transparent")
@@ -369,9 +846,7 @@ class App(customtkinter.CTk):
 
         # menu and shortcuts
         self.create_menu()
-
-        # checar fila de threads
-        self.after(200, self._process_thread_queue)
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
 
     # ----------------- Calendar popup -----------------
     def _no_calendar_installed(self):
@@ -450,26 +925,89 @@ class App(customtkinter.CTk):
     # ----------------- Config / IO -----------------
     def load_organizations(self):
         try:
-            with open(CONFIG_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
+            key = _cfg_key(os.stat(CONFIG_FILE))
+            if _cfg_cache["key"] != key:
+                with open(CONFIG_FILE, "rb") as f:
+                    _cfg_cache["data"] = _json_loads(f.read())
+                _cfg_cache["key"] = key
+            # cópia rasa: o App substitui/remove entradas, nunca altera os dicts internos
+            return dict(_cfg_cache["data"])
         except Exception:
             return {}
 
     def save_organizations_to_file(self):
+        # nada mudou desde a última gravação (ex.: importação em que tudo foi recusado)
+        if not self._orgs_dirty:
+            return
         try:
-            with open(CONFIG_FILE, "w", encoding="utf-8") as f:
-                json.dump(self.organizations, f, indent=4, ensure_ascii=False)
+            data = _json_dumps(self.organizations, indent=4)
+            data_hash = hash(data)
+            if data_hash == self._saved_hash:
+                self._orgs_dirty = False
+                return
+            with open(CONFIG_FILE, "wb") as f:
+                f.write(data)
+            self._saved_hash = data_hash
+            self._orgs_dirty = False
+            _cfg_cache["data"] = dict(self.organizations)
+            _cfg_cache["key"] = _cfg_key(os.stat(CONFIG_FILE))
         except Exception as e:
             messagebox.showerror("Erro ao salvar", f"Não foi possível salvar config:\n{e}")
 
+    def _get_org_names(self):
+        if self._org_names_cache is None:
+            self._org_names_cache = tuple(self.organizations.keys())
+        return self._org_names_cache
+
+    def _organizations_changed(self):
+        # chamado após qualquer alteração em self.organizations
+        self._orgs_dirty = True
+        self._org_names_cache = None
+        self._compiled.clear()
+        self._match_cache.clear()
+        self._orgs_generation += 1
+
+    def _scan_organization(self, org_name, org, cancel=None):
+        scan = self._compiled.get(org_name)
+        if scan is None:
+            scan = self._compiled[org_name] = compile_organization(org)
+        return scan(cancel)
+
+    def _cached_matches(self, org_name):
+        entry = self._match_cache.get(org_name)
+        if entry is not None:
+            self._match_cache.move_to_end(org_name)
+        return entry
+
+    def _remember_matches(self, org_name, mtime_ns, files):
+        self._match_cache[org_name] = (mtime_ns, files)
+        self._match_cache.move_to_end(org_name)
+        while len(self._match_cache) > _MATCH_CACHE_SIZE:
+            self._match_cache.popitem(last=False)
+
+    def _select_org(self, name):
+        org = self.organizations.get(name)
+        self._selected_org = (name, org) if org is not None else None
+
+    def _current_org(self):
+        # (nome, dict) da organização selecionada; sem seleção válida avisa o usuário e retorna None
+        if self._selected_org is None:
+            messagebox.showwarning("Aviso", "Selecione uma organização válida.")
+        return self._selected_org
+
     def update_combobox(self):
-        names = list(self.organizations.keys())
-        if not names:
-            names = ["Nenhuma organização criada"]
+        names = self._get_org_names() or ("Nenhuma organização criada",)
         self.org_combobox.configure(values=names)
         self.org_combobox.set(names[0])
+        self._select_org(names[0])
         self.org_count_label.configure(text=f"{len(self.organizations)} organização(ões) salvas")
-        self.details_label.configure(text="Detalhes aparecerão aqui.")
+        self._set_details("Detalhes aparecerão aqui.")
+
+    def _set_details(self, text):
+        self.details_box.configure(state="normal")
+        self.details_box.delete("1.0", "end")
+        self.details_box.insert("end", text)
+        self.details_box.configure(state="disabled")
 
     # ----------------- UI helpers -----------------
     def show_creation_frame(self):
@@ -549,34 +1087,29 @@ class App(customtkinter.CTk):
             "start_date": start or "",
             "end_date": end or ""
         }
+        self._organizations_changed()
         self.save_organizations_to_file()
         messagebox.showinfo("Sucesso", f"Organização '{name}' salva.")
         self.show_main_frame()
 
     def delete_organization(self):
-        org_name = self.org_combobox.get()
-        if not org_name or org_name == "Nenhuma organização criada":
-            messagebox.showwarning("Aviso", "Selecione uma organização válida.")
-            return
-        if org_name not in self.organizations:
-            messagebox.showerror("Erro", "Organização não encontrada.")
+        sel = self._current_org()
+        if sel is None:
             return
+        org_name, _ = sel
         if not messagebox.askyesno("Confirmar Exclusão", f"Excluir '{org_name}'?"):
             return
         self.organizations.pop(org_name, None)
+        self._organizations_changed()
         self.save_organizations_to_file()
         messagebox.showinfo("Removido", f"Organização '{org_name}' excluída.")
         self.update_combobox()
 
     def edit_organization(self):
-        org_name = self.org_combobox.get()
-        if not org_name or org_name == "Nenhuma organização criada":
-            messagebox.showwarning("Aviso", "Selecione uma organização válida.")
-            return
-        org = self.organizations.get(org_name)
-        if not org:
-            messagebox.showerror("Erro", "Organização não encontrada.")
+        sel = self._current_org()
+        if sel is None:
             return
+        org_name, org = sel
         self.editing_org_original_name = org_name
         self.name_entry.delete(0, "end")
         self.name_entry.insert(0, org_name)
@@ -604,27 +1137,27 @@ class App(customtkinter.CTk):
         self.creation_frame.grid(row=0, column=0, sticky="nsew", padx=16, pady=16)
 
     def duplicate_organization(self):
-        org_name = self.org_combobox.get()
-        if org_name not in self.organizations or org_name == "Nenhuma organização criada":
-            messagebox.showwarning("Aviso", "Selecione uma organização válida.")
+        sel = self._current_org()
+        if sel is None:
             return
+        org_name, org = sel
         base_name = f"{org_name} (cópia)"
         i = 1
         new_name = base_name
         while new_name in self.organizations:
             i += 1
             new_name = f"{base_name} {i}"
-        self.organizations[new_name] = dict(self.organizations[org_name])
+        self.organizations[new_name] = dict(org)
+        self._organizations_changed()
         self.save_organizations_to_file()
         messagebox.showinfo("Duplicado", f"Organização duplicada como '{new_name}'.")
         self.update_combobox()
 
     def export_organization(self):
-        org_name = self.org_combobox.get()
-        if org_name not in self.organizations or org_name == "Nenhuma organização criada":
-            messagebox.showwarning("Aviso", "Selecione uma organização válida.")
+        sel = self._current_org()
+        if sel is None:
             return
-        org = self.organizations[org_name]
+        org_name, org = sel
         path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON", "*.json")], title="Exportar organização como...")
         if not path:
             return
@@ -650,6 +1183,8 @@ class App(customtkinter.CTk):
                         continue
                 self.organizations[k] = v
                 added += 1
+            if added:
+                self._organizations_changed()
             self.save_organizations_to_file()
             messagebox.showinfo("Importado", f"{added} organização(ões) importada(s).")
             self.update_combobox()
@@ -662,41 +1197,155 @@ class App(customtkinter.CTk):
         self.show_preview()
 
     def show_preview(self):
-        org_name = self.org_combobox.get()
-        if not org_name or org_name == "Nenhuma organização criada":
-            messagebox.showwarning("Aviso", "Selecione uma organização válida.")
-            return
-        org = self.organizations.get(org_name)
-        if not org:
-            messagebox.showerror("Erro", "Organização não encontrada.")
+        sel = self._current_org()
+        if sel is None:
             return
+        org_name, org = sel
+        # o gerador é criado aqui (usa o cache de _compiled), mas a pasta só é lida no thread da varredura
+        cancelled = threading.Event()
+        scan = self._scan_organization(org_name, org, cancelled)
+        # se a pasta de origem não mudou (mesmo mtime) desde a última varredura, ela é reaproveitada
+        cached = self._cached_matches(org_name)
+        generation = self._orgs_generation
+        matched = []
+
+        def execute():
+            self._confirm_and_execute_preview(preview_win, matched, org)
 
-        matched = get_matched_files(org)
         preview_win = customtkinter.CTkToplevel(self)
         preview_win.title(f"Pré-visualizar: {org_name}")
         preview_win.geometry("760x480")
+        # fechar a janela interrompe a varredura no próximo bloco do scandir
+        preview_win.bind("<Destroy>", lambda e: cancelled.set() if e.widget is preview_win else None)
 
-        info = customtkinter.CTkLabel(preview_win, text=f"{len(matched)} arquivo(s) encontrados que correspondem aos filtros.")
+        info = customtkinter.CTkLabel(preview_win, text="Escaneando...")
         info.pack(padx=12, pady=(12,6), anchor="w")
+        spinner = customtkinter.CTkProgressBar(preview_win, orientation="horizontal", mode="indeterminate")
+        spinner.pack(fill="x", padx=12, pady=(0,6))
+        spinner.start()
 
         frame = customtkinter.CTkFrame(preview_win)
         frame.pack(fill="both", expand=True, padx=12, pady=(0,12))
         scrollbar = customtkinter.CTkScrollbar(frame, orientation="vertical")
         scrollbar.pack(side="right", fill="y")
-        lb = tkinter.Listbox(frame, yscrollcommand=scrollbar.set)
-        for p in matched:
-            lb.insert("end", str(p))
+        lb = tkinter.Listbox(frame)
         lb.pack(side="left", fill="both", expand=True)
-        scrollbar.configure(command=lb.yview)
+        set_items = self._virtual_listbox(lb, scrollbar)
 
         btn_frame = customtkinter.CTkFrame(preview_win, fg_color="transparent")
         btn_frame.pack(fill="x", padx=12, pady=(0,12))
         exec_btn = customtkinter.CTkButton(btn_frame, text="Executar Movimento", fg_color="#ff7744",
-                                          command=lambda: self._confirm_and_execute_preview(preview_win, matched, org))
+                                          command=execute, state="disabled")
         exec_btn.pack(side="right", padx=(6,0))
         close_btn = customtkinter.CTkButton(btn_frame, text="Fechar", command=preview_win.destroy)
         close_btn.pack(side="right", padx=(0,6))
 
+        def on_count(found):
+            if preview_win.winfo_exists():
+                info.configure(text=f"Escaneando... {found} arquivo(s) encontrados até agora.")
+
+        def on_ready(files, mtime_ns):
+            # a organização pode ter sido editada durante a varredura: esse resultado usa os
+            # filtros antigos e não pode ficar guardado sob o mesmo nome
+            if mtime_ns is not None and generation == self._orgs_generation:
+                self._remember_matches(org_name, mtime_ns, files)
+            if not preview_win.winfo_exists():
+                return
+            matched.extend(files)
+            spinner.stop()
+            spinner.pack_forget()
+            info.configure(text=f"{len(files)} arquivo(s) encontrados que correspondem aos filtros.")
+            set_items(matched)
+            exec_btn.configure(state="normal")
+
+        def on_error(msg):
+            if preview_win.winfo_exists():
+                spinner.stop()
+                spinner.pack_forget()
+                info.configure(text=f"Erro ao escanear: {msg}")
+
+        def job():
+            try:
+                mtime_ns = os.stat(org["source"]).st_mtime_ns
+            except OSError:
+                mtime_ns = None
+            if cached is not None and mtime_ns is not None and cached[0] == mtime_ns:
+                self._post(on_ready, cached[1], None)
+                return
+            files = []
+            last_ts = time.monotonic()
+            try:
+                for p in scan:
+                    files.append(p)
+                    now = time.monotonic()
+                    if now - last_ts > 0.2:
+                        last_ts = now
+                        self._post(on_count, len(files))
+            except Exception as e:
+                file_logger.exception("Erro na varredura da pré-visualização: %s", e)
+                self._post(on_error, str(e))
+                return
+            if not cancelled.is_set():
+                self._post(on_ready, files, mtime_ns)
+
+        self._submit_scan(job)
+
+    def _virtual_listbox(self, lb, scrollbar) -> Callable[[List], None]:
+        """Liga lb e scrollbar como lista virtual e retorna a função que define os itens.
+
+        Os itens ficam só em Python; o Listbox recebe apenas as linhas visíveis, refeitas
+        quando a barra, a roda do mouse ou o tamanho da janela mudam a faixa exibida.
+        """
+        # geometria do Listbox: cada linha tem linespace + 1 mais a borda de seleção dos dois lados,
+        # e a área útil desconta borda + anel de foco em cima e embaixo. Só linhas inteiras contam;
+        # com uma a mais a última ficaria cortada e o fim da lista nunca apareceria.
+        px = lambda opt: lb.winfo_pixels(lb.cget(opt))
+        row_height = (tkfont.Font(font=lb.cget("font")).metrics("linespace") + 1
+                      + 2 * px("selectborderwidth"))
+        inset = 2 * (px("borderwidth") + px("highlightthickness"))
+        state = {"items": [], "first": 0, "shown": None}
+
+        def render(first):
+            items = state["items"]
+            rows = max(1, (lb.winfo_height() - inset) // row_height)
+            first = max(0, min(first, len(items) - rows))
+            state["first"] = first
+            if state["shown"] == (first, rows):
+                return
+            state["shown"] = (first, rows)
+            lb.delete(0, "end")
+            lb.insert("end", *map(str, items[first:first + rows]))
+            if items:
+                scrollbar.set(first / len(items), min(1.0, (first + rows) / len(items)))
+            else:
+                scrollbar.set(0.0, 1.0)
+
+        def yview(*args):
+            if args[0] == "moveto":
+                render(int(float(args[1]) * len(state["items"])))
+            elif args[0] == "scroll":
+                step = int(args[1])
+                if args[2] == "pages":
+                    step *= state["shown"][1] if state["shown"] else 1
+                render(state["first"] + step)
+
+        def on_wheel(event):
+            # Button-4/5 no X11; delta no Windows/macOS
+            up = event.num == 4 or getattr(event, "delta", 0) > 0
+            render(state["first"] + (-3 if up else 3))
+            return "break"
+
+        def set_items(items):
+            state["items"] = items
+            state["shown"] = None
+            render(0)
+
+        scrollbar.configure(command=yview)
+        lb.bind("<Configure>", lambda e: render(state["first"]))
+        for seq in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            lb.bind(seq, on_wheel)
+        return set_items
+
     def _confirm_and_execute_preview(self, preview_win, matched_files, org):
         if not matched_files:
             messagebox.showinfo("Nada a Fazer", "Não há arquivos correspondentes.")
@@ -726,65 +1375,45 @@ class App(customtkinter.CTk):
             pw.destroy()
             return
 
-        # progress callback enfileira atualizações para o thread principal
-        def progress_cb(completed, tot):
-            self._thread_queue.put(("progress", completed, tot))
+        def on_progress(completed, tot):
+            if pw.winfo_exists():
+                progress.set(completed / tot if tot else 0.0)
+                status_lbl.configure(text=f"{completed} / {tot}")
+
+        def on_done(results):
+            # arquivos saíram da origem: as varreduras guardadas não valem mais
+            self._match_cache.clear()
+            moved = results["actions"].count("moved")
+            messagebox.showinfo("Concluído", f"Operação finalizada.\n{moved} arquivo(s) movidos.")
+            if pw.winfo_exists():
+                pw.destroy()
+            self.update_combobox()
 
-        def worker():
-            try:
-                results = move_files(matched_files, org["destination"], dry_run=dry_run, progress_callback=progress_cb)
-                # após mover, gera undo record (apenas operações efetivas moved)
-                record = {
-                    "timestamp": datetime.utcnow().isoformat(),
-                    "operations": [{"source": r["source"], "dest": r["dest"], "action": r["action"]} for r in results]
-                }
-                # salvar undo apenas quando não for dry_run and there are moved files
-                if not dry_run and any(r.get("action") == "moved" for r in results):
-                    save_undo_record(record)
-                # store in app state for UI
-                self._thread_queue.put(("done", results))
-            except Exception as e:
-                file_logger.exception("Erro na thread de execução: %s", e)
-                self._thread_queue.put(("error", str(e)))
+        def on_error(msg):
+            messagebox.showerror("Erro na Execução", f"Ocorreu erro: {msg}")
+            if pw.winfo_exists():
+                pw.destroy()
 
-        t = threading.Thread(target=worker, daemon=True)
-        t.start()
+        # progress callback enfileira atualizações (agrupadas) para o thread principal
+        progress_cb = self._progress_poster(on_progress)
 
-        # função local para atualizar UI a partir da fila
-        def handle_queue():
+        def job():
             try:
-                while not self._thread_queue.empty():
-                    item = self._thread_queue.get_nowait()
-                    if item[0] == "progress":
-                        completed, tot = item[1], item[2]
-                        progress.set(completed / tot if tot else 0.0)
-                        status_lbl.configure(text=f"{completed} / {tot}")
-                    elif item[0] == "done":
-                        results = item[1]
-                        moved = sum(1 for r in results if r.get("action") == "moved")
-                        messagebox.showinfo("Concluído", f"Operação finalizada.\n{moved} arquivo(s) movidos.")
-                        pw.destroy()
-                        self.update_combobox()
-                    elif item[0] == "error":
-                        messagebox.showerror("Erro na Execução", f"Ocorreu erro: {item[1]}")
-                        pw.destroy()
-            except Exception:
-                file_logger.exception("Erro processando fila de thread")
-            finally:
-                if pw.winfo_exists():
-                    self.after(200, handle_queue)
+                # cada arquivo movido vai para o undo record assim que termina
+                with undo_recorder() as record_op:
+                    results = move_files(matched_files, org["destination"], dry_run=dry_run,
+                                         progress_callback=progress_cb, on_op_completed=record_op)
+                self._post(on_done, results)
+            except Exception as e:
+                file_logger.exception("Erro na thread de execução: %s", e)
+                self._post(on_error, str(e))
 
-        # inicia loop de checagem
-        self.after(200, handle_queue)
+        self._submit(job)
 
     # ----------------- Undo -----------------
     def undo_last_execution(self):
         # tenta carregar undo record e perguntar confirmação
-        rec = load_undo_record()
-        if not rec:
-            messagebox.showinfo("Nada a Desfazer", "Nenhuma operação anterior encontrada.")
-            return
-        ops = rec.get("operations", [])
+        ops = list(load_undo_record())
         if not ops:
             messagebox.showinfo("Nada a Desfazer", "Nenhuma operação anterior encontrada.")
             return
@@ -803,54 +1432,41 @@ class App(customtkinter.CTk):
         status_lbl = customtkinter.CTkLabel(pw, text="0 / 0")
         status_lbl.pack(padx=12, pady=(0,12))
 
-        def progress_cb(c, t):
-            self._thread_queue.put(("undo_progress", c, t))
+        def on_progress(c, t):
+            if pw.winfo_exists():
+                progress.set(c / t if t else 0.0)
+                status_lbl.configure(text=f"{c} / {t}")
+
+        def on_done(res):
+            self._match_cache.clear()
+            messagebox.showinfo("Desfeito", "Operação de desfazer concluída.")
+            if pw.winfo_exists():
+                pw.destroy()
+            self.update_combobox()
+
+        def on_error(msg):
+            messagebox.showerror("Erro", f"Erro durante undo: {msg}")
+            if pw.winfo_exists():
+                pw.destroy()
+
+        progress_cb = self._progress_poster(on_progress)
 
-        def worker_undo():
+        def job():
             try:
                 result = undo_last(progress_callback=progress_cb)
-                self._thread_queue.put(("undo_done", result))
+                self._post(on_done, result)
             except Exception as e:
                 file_logger.exception("Erro no undo thread: %s", e)
-                self._thread_queue.put(("undo_error", str(e)))
+                self._post(on_error, str(e))
 
-        t = threading.Thread(target=worker_undo, daemon=True)
-        t.start()
-
-        def handle_q():
-            try:
-                while not self._thread_queue.empty():
-                    item = self._thread_queue.get_nowait()
-                    if item[0] == "undo_progress":
-                        c, t = item[1], item[2]
-                        progress.set(c / t if t else 0.0)
-                        status_lbl.configure(text=f"{c} / {t}")
-                    elif item[0] == "undo_done":
-                        res = item[1]
-                        messagebox.showinfo("Desfeito", "Operação de desfazer concluída.")
-                        pw.destroy()
-                        self.update_combobox()
-                    elif item[0] == "undo_error":
-                        messagebox.showerror("Erro", f"Erro durante undo: {item[1]}")
-                        pw.destroy()
-            except Exception:
-                file_logger.exception("Erro processando undo fila")
-            finally:
-                if pw.winfo_exists():
-                    self.after(200, handle_q)
-
-        self.after(200, handle_q)
+        self._submit(job)
 
     # ----------------- Details / Logs -----------------
     def show_details(self):
-        org_name = self.org_combobox.get()
-        if not org_name or org_name == "Nenhuma organização criada":
-            messagebox.showwarning("Aviso", "Selecione uma organização válida.")
-            return
-        org = self.organizations.get(org_name)
-        if not org:
-            messagebox.showerror("Erro", "Organização não encontrada.")
+        sel = self._current_org()
+        if sel is None:
             return
+        org_name, org = sel
         keywords = ", ".join(org.get("keywords", []))
         date_filter = "Sim" if org.get("date_filter_enabled") else "Não"
         start = org.get("start_date") or "—"
@@ -864,7 +1480,7 @@ class App(customtkinter.CTk):
             f"Data de Início: {start}\n"
             f"Data de Fim: {end}"
         )
-        self.details_label.configure(text=details)
+        self._set_details(details)
 
     def open_logs(self):
         logfile = Path(LOGFILE)
@@ -874,10 +1490,12 @@ class App(customtkinter.CTk):
         try:
             if sys.platform.startswith("win"):
                 os.startfile(str(logfile))
-            elif sys.platform.startswith("darwin"):
-                os.system(f"open '{logfile}'")
             else:
-                os.system(f"xdg-open '{logfile}'")
+                # executa o abridor direto, sem shell no meio: nada a escapar no caminho
+                opener = "open" if sys.platform.startswith("darwin") else "xdg-open"
+                subprocess.Popen([opener, str(logfile)], stdin=subprocess.DEVNULL,
+                                 stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                 start_new_session=True)
         except Exception as e:
             messagebox.showerror("Erro", f"Não foi possível abrir logs:\n{e}")
 
@@ -888,7 +1506,7 @@ class App(customtkinter.CTk):
         filemenu.add_command(label="Nova Organização (Ctrl+N)", command=self.show_creation_frame, accelerator="Ctrl+N")
         filemenu.add_command(label="Salvar (Ctrl+S)", command=self.save_organization, accelerator="Ctrl+S")
         filemenu.add_separator()
-        filemenu.add_command(label="Sair", command=self.destroy)
+        filemenu.add_command(label="Sair", command=self._on_close)
         menubar.add_cascade(label="Arquivo", menu=filemenu)
 
         helpmenu = tkinter.Menu(menubar, tearoff=0)
@@ -896,16 +1514,136 @@ class App(customtkinter.CTk):
         menubar.add_cascade(label="Ajuda", menu=helpmenu)
 
         self.configure(menu=menubar)
-        # Bind shortcuts
-        self.bind_all("<Control-n>", lambda e: self.show_creation_frame())
-        self.bind_all("<Control-N>", lambda e: self.show_creation_frame())
-        self.bind_all("<Control-s>", lambda e: self.save_organization())
-        self.bind_all("<Control-S>", lambda e: self.save_organization())
+        # Bind shortcuts: um único binding; a tecla é resolvida em Python (maiúscula ou minúscula)
+        self._ctrl_shortcuts = {"n": self.show_creation_frame, "s": self.save_organization}
+        self.bind_all("<Control-KeyPress>", self._on_ctrl_key)
+
+    def _on_ctrl_key(self, event):
+        action = self._ctrl_shortcuts.get(event.keysym.lower())
+        if action is not None:
+            action()
 
     # ----------------- Thread queue processing -----------------
+    def _worker(self):
+        # executa em série as tarefas enfileiradas (mover, desfazer) fora do thread do Tk
+        while True:
+            job = self._job_queue.get()
+            if job is _SHUTDOWN:
+                break
+            self._run_job(job, self._job_finished)
+
+    def _run_job(self, job, finished):
+        try:
+            job()
+        except Exception:
+            file_logger.exception("Erro em tarefa de segundo plano")
+        # vai depois de tudo o que o job publicou: a fila é esvaziada antes de a consulta parar
+        self._post(finished)
+
+    def _submit(self, job):
+        # chamado no thread do Tk: enfileira job para o worker e, sem tkthread, liga a consulta
+        # periódica de _result_queue até que todos os jobs tenham terminado
+        self._pending_jobs += 1
+        self._job_queue.put(job)
+        self._start_polling()
+
+    def _submit_scan(self, job):
+        # varreduras só leem: cada uma roda num thread daemon próprio, sem esperar um move/undo
+        # longo da fila nem atrasá-lo, e não seguram o fechamento da janela (_on_close)
+        self._pending_scans += 1
+        threading.Thread(target=self._run_job, args=(job, self._scan_finished), daemon=True).start()
+        self._start_polling()
+
+    def _start_polling(self):
+        if not HAS_TKTHREAD and self._poll_id is None:
+            self._poll_id = self.after(200, self._process_thread_queue)
+
+    def _scan_finished(self):
+        self._pending_scans -= 1
+
+    def _job_finished(self):
+        self._pending_jobs -= 1
+        if self._pending_jobs == 0 and self._close_when_idle:
+            self._on_close()
+
+    def _post(self, callback, *args):
+        # chamado pelo thread de trabalho: agenda callback(*args) no thread do Tk
+        # depois do destroy() não há loop do Tk (tkthread falharia no próprio thread dele)
+        if self._destroyed:
+            return
+        if HAS_TKTHREAD:
+            tkthread.call_nosync(self._run_posted, callback, args)
+        else:
+            self._result_queue.append((callback, args))
+
+    def _run_posted(self, callback, args):
+        # com tkthread um callback pode chegar depois de a janela fechar; não há mais widgets
+        if self._destroyed:
+            return
+        try:
+            callback(*args)
+        except Exception:
+            file_logger.exception("Erro processando fila de thread")
+
+    def _progress_poster(self, on_progress):
+        # progress_callback para o thread de trabalho: publica on_progress a cada 1/200 do total
+        # ou após 50 ms sem atualização, em vez de uma vez por arquivo; a última sempre vai
+        last_ts = 0.0
+
+        def progress_cb(completed, total):
+            nonlocal last_ts
+            now = time.monotonic()
+            step = max(1, total // 200)
+            if completed == total or completed % step == 0 or now - last_ts > 0.05:
+                last_ts = now
+                self._post(on_progress, completed, total)
+
+        return progress_cb
+
     def _process_thread_queue(self):
-        # placeholder if needed, already used by specific handlers
-        self.after(200, self._process_thread_queue)
+        self._poll_id = None
+        if self._destroyed:
+            return
+        try:
+            while True:
+                try:
+                    callback, args = self._result_queue.popleft()
+                except IndexError:
+                    break
+                self._run_posted(callback, args)
+        finally:
+            # sem tarefas pendentes não há o que consultar; _submit religa a consulta
+            if self._pending_jobs + self._pending_scans > 0 and not self._destroyed:
+                self._poll_id = self.after(200, self._process_thread_queue)
+
+    def destroy(self):
+        self._destroyed = True
+        if self._poll_id is not None:
+            self.after_cancel(self._poll_id)
+            self._poll_id = None
+        self._job_queue.put(_SHUTDOWN)
+        super().destroy()
+
+    def _on_close(self):
+        # o worker é daemon: fechar agora o mataria no meio de um movimento ou de uma cópia
+        if self._pending_jobs > 0:
+            # Sim: fecha quando terminar; Não: fecha já (ex.: cópia presa num compartilhamento
+            # de rede); Cancelar: mantém a janela aberta
+            answer = messagebox.askyesnocancel(
+                "Operação em andamento",
+                "Há uma operação em andamento e fechar agora pode interrompê-la no meio de um arquivo.\n\n"
+                "Sim: fechar automaticamente quando ela terminar\n"
+                "Não: fechar agora mesmo assim\n"
+                "Cancelar: manter a janela aberta")
+            if answer is None:
+                self._close_when_idle = False
+                return
+            if answer:
+                self._close_when_idle = True
+                return
+        # grava alterações pendentes (se houver) antes de fechar
+        self.save_organizations_to_file()
+        self.destroy()
 
 
 if __name__ == "__main__":